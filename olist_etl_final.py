@@ -13,7 +13,9 @@ Thread: allows the API to run in the background.
 
 requests: used to fetch API data from endpoints.
 
-time: to delay execution a bit.
+time: to wait for the API to become ready.
+
+pyarrow (optional): memory-mapped Arrow files for StartAPI's mmap serve mode.
 '''
 
 import logging
@@ -21,9 +23,12 @@ from sqlalchemy import create_engine
 from sqlalchemy.exc import SQLAlchemyError
 import urllib
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
+from sqlalchemy import event
 import pandas as pd
+import numpy as np
 import os
+import re
 import datetime
 from collections import Counter
 from fastapi import FastAPI, HTTPException
@@ -31,17 +36,51 @@ from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import nest_asyncio
 import pandas as pd
-from threading import Thread
+from threading import Thread, RLock, get_ident
 import requests
 import time
+import atexit
+import json
+import socket
+import subprocess
+import sys
+import cProfile
+import functools
+import inspect
+import tracemalloc
+from contextlib import contextmanager
 
 
 class StartAPI:
-    def __init__(self, api_data, host="127.0.0.1", port=8000):
+    '''
+    Serves order_payments and order_reviews page by page.
+
+    Parameters:
+        api_data (dict): paths of the payments/reviews csv files
+        serve_mode (str): 'memory' loads the csvs into pandas in this process,
+            'mmap' converts them once to uncompressed Arrow files and memory-maps them,
+            so every worker process shares the same copy of the data through the OS page cache
+        workers (int): number of uvicorn worker processes, more than 1 requires serve_mode='mmap'
+        mmap_dir (str): folder for the Arrow files, defaults to an api_cache folder next to this script
+            (kept out of the raw data folder, which Extract reads file by file)
+    '''
+    SERVE_MODES = ('memory', 'mmap')
+
+    def __init__(self, api_data, host="127.0.0.1", port=8000, serve_mode="memory", workers=1, mmap_dir=None):
+        if serve_mode not in self.SERVE_MODES:
+            raise ValueError(f"Unsupported serve mode '{serve_mode}', expected one of {self.SERVE_MODES}")
+        if workers > 1 and serve_mode != 'mmap':
+            raise ValueError("Multiple workers require serve_mode='mmap'")
         self.app = FastAPI()
         self.api_data = api_data
         self.host = host
         self.port = port
+        self.serve_mode = serve_mode
+        self.workers = workers
+        self.mmap_dir = mmap_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api_cache')
+        self._server_process = None
+        self._server_thread = None
+        self._server = None
         self._load_data()
         self._define_routes()
         
@@ -52,37 +91,74 @@ class StartAPI:
         for only 2 specific tables (order_payments, order_reviews)
         '''
         try:
-            self.payments_df = pd.read_csv(self.api_data['payments'])
-            self.reviews_df = pd.read_csv(self.api_data['reviews'])
+            if self.serve_mode == 'mmap':
+                self.mmap_paths = {key: self._to_mmap_file(path) for key, path in self.api_data.items()}
+                self._tables = {key: self._open_mmap_file(path) for key, path in self.mmap_paths.items()}
+            else:
+                self.payments_df = pd.read_csv(self.api_data['payments'])
+                self.reviews_df = pd.read_csv(self.api_data['reviews'])
+                # clean once here instead of on every request, keeping only the cleaned copy
+                self.reviews_df = self.reviews_df.where(pd.notnull(self.reviews_df), None)
+                self._tables = {'payments': self.payments_df, 'reviews': self.reviews_df}
         except Exception as e:
             print("Error loading CSVs:", str(e))
             raise
 
+    def _to_mmap_file(self, csv_path):
+        '''
+        Converts a csv to an uncompressed Arrow file (once, reused until the csv changes)
+        and returns its path. Arrow files passed in directly are used as they are.
+        '''
+        if csv_path.endswith('.arrow'):
+            return csv_path
+
+        import pyarrow as pa
+        from pyarrow import feather
+
+        os.makedirs(self.mmap_dir, exist_ok=True)
+        arrow_path = os.path.join(self.mmap_dir, os.path.splitext(os.path.basename(csv_path))[0] + '.arrow')
+        if os.path.exists(arrow_path) and os.path.getmtime(arrow_path) >= os.path.getmtime(csv_path):
+            return arrow_path
+
+        print(f"Converting {csv_path} to {arrow_path}")
+        table = pa.Table.from_pandas(pd.read_csv(csv_path), preserve_index=False)
+        # write next to the target and rename, so running workers never see a half written file
+        tmp_path = arrow_path + '.tmp'
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, arrow_path)
+        return arrow_path
+
+    def _open_mmap_file(self, arrow_path):
+        # zero-copy: pages are read from the file on demand and shared between processes
+        import pyarrow as pa
+        return pa.ipc.open_file(pa.memory_map(arrow_path, 'r')).read_all()
+
+    def _page(self, key, offset, limit):
+        table = self._tables[key]
+        if self.serve_mode == 'mmap':
+            # nulls come back as None, so no extra cleaning is needed
+            data = table.slice(offset, limit).to_pylist()
+        else:
+            data = table.iloc[offset:offset + limit].to_dict(orient="records")
+        return {
+            "data": data,
+            "total_records": len(table),
+            "offset": offset,
+            "limit": limit
+        }
+
     def _define_routes(self):
         @self.app.get("/order_payments")
         def get_payments(offset: int = 0, limit: int = 10000):
             try:
-                data = self.payments_df.iloc[offset:offset + limit].to_dict(orient="records")
-                return {
-                    "data": data,
-                    "total_records": len(self.payments_df),
-                    "offset": offset,
-                    "limit": limit
-                }
+                return self._page('payments', offset, limit)
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
 
         @self.app.get("/order_reviews")
         def get_order_reviews(offset: int = 0, limit: int = 10000):
             try:
-                cleaned_data = self.reviews_df.where(pd.notnull(self.reviews_df), None)
-                data = cleaned_data.iloc[offset:offset + limit].to_dict(orient="records")
-                return {
-                    "data": data,
-                    "total_records": len(cleaned_data),
-                    "offset": offset,
-                    "limit": limit
-                }
+                return self._page('reviews', offset, limit)
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
 
@@ -90,14 +166,80 @@ class StartAPI:
         def test():
             return {"message": "Server is running!"}
 
-    def run(self):
-        nest_asyncio.apply()
-        thread = Thread(target=self._start_server, daemon=True)
-        thread.start()
-        time.sleep(2)
+    def run(self, ready_timeout=30):
+        if self.workers > 1:
+            self._start_workers()
+        else:
+            nest_asyncio.apply()
+            self._server = uvicorn.Server(uvicorn.Config(self.app, host=self.host, port=self.port))
+            self._server_thread = Thread(target=self._start_server, daemon=True)
+            self._server_thread.start()
+        self._wait_until_ready(ready_timeout)
 
     def _start_server(self):
-        uvicorn.run(self.app, host=self.host, port=self.port)
+        self._server.run()
+
+    def _start_workers(self):
+        '''
+        Starts uvicorn with several worker processes, each one builds its app
+        with create_mmap_app() and maps the Arrow files prepared by this process.
+        '''
+        # a server already answering /test on this port would be taken for ours
+        # before our workers fail to bind, so refuse to start in that case
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            if sock.connect_ex((self.host, self.port)) == 0:
+                raise RuntimeError(f"Port {self.port} on {self.host} is already in use")
+
+        module_dir, module_file = os.path.split(os.path.abspath(__file__))
+        module_name = os.path.splitext(module_file)[0]
+        env = dict(os.environ, OLIST_API_DATA=json.dumps(self.mmap_paths))
+        self._server_process = subprocess.Popen([
+            sys.executable, "-m", "uvicorn", f"{module_name}:create_mmap_app", "--factory",
+            "--app-dir", module_dir,
+            "--host", self.host,
+            "--port", str(self.port),
+            "--workers", str(self.workers)
+        ], env=env)
+        atexit.register(self.stop)
+
+    def _wait_until_ready(self, timeout):
+        '''
+        Polls the /test endpoint until the server answers, instead of sleeping a fixed time.
+        '''
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._server_process is not None and self._server_process.poll() is not None:
+                raise RuntimeError(f"API server exited with code {self._server_process.returncode}")
+            if self._server_thread is not None and not self._server_thread.is_alive():
+                raise RuntimeError("API server stopped before becoming ready, see the uvicorn error above")
+            if self._server is not None and not self._server.started:
+                # not bound yet, don't mistake another server on this port for ours
+                time.sleep(0.1)
+                continue
+            try:
+                if requests.get(f"http://{self.host}:{self.port}/test", timeout=1).ok:
+                    print(f"API is ready on http://{self.host}:{self.port}")
+                    return
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError(f"API did not become ready within {timeout} seconds")
+
+    def stop(self):
+        if self._server_process is not None and self._server_process.poll() is None:
+            self._server_process.terminate()
+            self._server_process.wait()
+        if self._server_thread is not None and self._server_thread.is_alive():
+            self._server.should_exit = True
+            self._server_thread.join()
+
+def create_mmap_app():
+    '''
+    App factory for the uvicorn worker processes started by StartAPI in mmap mode.
+    Arrow file paths are passed through the OLIST_API_DATA environment variable.
+    '''
+    api_data = json.loads(os.environ['OLIST_API_DATA'])
+    return StartAPI(api_data, serve_mode='mmap').app
 
 class SQLConnection:
     def __init__(self, config):
@@ -159,9 +301,186 @@ class CreateDataBaseTables:
                 else:
                     continue
 
+class OptimizeDtypes:
+    '''
+    Shrinks extracted DataFrames using the column types declared in the DDL script.
+
+    - INT columns are downcast to the smallest integer type (nullable Int8/16/32 when they have NULLs)
+    - float columns become float32 only when no value changes
+    - low-cardinality nvarchar columns become categoricals (PK/FK columns are left as they are)
+
+    Parameters:
+        ddl_path (str): path of olist_ddl.txt
+        category_ratio (float): max share of distinct values for a string column to become categorical
+        memory_budget_mb (float): total size allowed for the extracted tables. A csv that would exceed
+            the remaining budget is parsed and optimized in chunks, so the unoptimized table is never
+            held in memory; the optimized chunks are still joined into one table for the rest of the pipeline.
+            Once the extracted tables exceed the budget a warning is printed (or an error raised, see strict_budget)
+        chunk_size (int): rows per chunk in chunked mode
+        expansion_factor (float): estimated in-memory size of a csv = file size * expansion_factor
+        strict_budget (bool): raise instead of warning when the budget is exceeded
+    '''
+    INT_TYPES = ('int', 'integer', 'smallint', 'tinyint', 'bigint')
+    FLOAT_TYPES = ('float', 'real')
+    STRING_TYPES = ('nvarchar', 'varchar', 'nchar', 'char')
+
+    def __init__(self, ddl_path, category_ratio=0.5, memory_budget_mb=None, chunk_size=100000, expansion_factor=4.0,
+                 strict_budget=False):
+        self.category_ratio = category_ratio
+        self.strict_budget = strict_budget
+        self.memory_budget = memory_budget_mb * 1024 ** 2 if memory_budget_mb else None
+        self.chunk_size = chunk_size
+        self.expansion_factor = expansion_factor
+        self.schema, self.key_columns = self._parse_ddl(ddl_path)
+        self.memory_report = []
+        self._used_bytes = 0
+
+    def _parse_ddl(self, ddl_path):
+        '''
+        Returns {table: {column: sql type}} and {table: set of PK/FK columns}
+        '''
+        with open(ddl_path, 'r') as file:
+            olist_ddl_script = file.read()
+
+        schema, key_columns = {}, {}
+        for table_name, body in re.findall(r"CREATE TABLE \[(\w+)\]\s*\((.*?)\)\s*;", olist_ddl_script, re.S | re.I):
+            columns, keys = {}, set()
+            for line in body.splitlines():
+                column = re.match(r"\s*\[(\w+)\]\s+(\w+)", line)
+                if column:
+                    columns[column.group(1)] = column.group(2).lower()
+                    if 'primary key' in line.lower():
+                        keys.add(column.group(1))
+            # PRIMARY KEY ([order_id], [payment_sequential]) / FOREIGN KEY (order_id) REFERENCES ...
+            for key_cols in re.findall(r"(?:PRIMARY|FOREIGN) KEY\s*\(([^)]*)\)", body, re.I):
+                keys.update(col.strip(' []') for col in key_cols.split(','))
+            schema[table_name] = columns
+            key_columns[table_name] = keys
+        return schema, key_columns
+
+    def optimize(self, table_name, df):
+        '''
+        Returns df with optimized dtypes and records its memory before and after.
+        '''
+        before = df.memory_usage(deep=True).sum()
+        df = self._optimize(table_name, df, self._categorical_columns(table_name, df))
+        self._report(table_name, before, df, chunked=False)
+        return df
+
+    def read_csv(self, table_name, file_path):
+        '''
+        Reads a csv and optimizes it. If the estimated size would exceed the
+        remaining memory budget, the csv is read and optimized chunk by chunk,
+        so the full unoptimized table is never held in memory.
+        '''
+        estimate = os.path.getsize(file_path) * self.expansion_factor
+        if self.memory_budget is None or self._used_bytes + estimate <= self.memory_budget:
+            return self.optimize(table_name, pd.read_csv(file_path))
+
+        print(f"{table_name}: estimated {estimate / 1024 ** 2:.1f} MB exceeds the memory budget, "
+              f"reading in chunks of {self.chunk_size} rows")
+        chunks, categorical = [], None
+        for chunk in pd.read_csv(file_path, chunksize=self.chunk_size):
+            if categorical is None:
+                # decide once, so all chunks end up with the same dtypes
+                categorical = self._categorical_columns(table_name, chunk)
+            chunks.append(self._optimize(table_name, chunk, categorical))
+        df = self._concat_chunks(table_name, chunks, categorical or [])
+        self._report(table_name, estimate, df, chunked=True)
+        return df
+
+    def _categorical_columns(self, table_name, df):
+        keys = self.key_columns.get(table_name, set())
+        return [
+            col for col, sql_type in self.schema.get(table_name, {}).items()
+            if sql_type in self.STRING_TYPES and col in df and col not in keys
+            and (pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col]))
+            and len(df) > 0
+            and df[col].nunique() <= self.category_ratio * len(df)
+        ]
+
+    def _optimize(self, table_name, df, categorical):
+        for col, sql_type in self.schema.get(table_name, {}).items():
+            if col not in df:
+                continue
+            if sql_type in self.INT_TYPES:
+                df[col] = self._downcast_int(df[col])
+            elif sql_type in self.FLOAT_TYPES:
+                df[col] = self._downcast_float(df[col])
+            elif col in categorical:
+                df[col] = df[col].astype('category')
+        return df
+
+    def _downcast_int(self, series):
+        if not pd.api.types.is_numeric_dtype(series):
+            return series
+        if not series.isna().any():
+            return pd.to_numeric(series, downcast='integer')
+
+        # NULLs make pandas read INT columns as float, use a nullable integer type instead
+        values = series.dropna()
+        if not (values % 1 == 0).all():
+            return series
+        for dtype in ('Int8', 'Int16', 'Int32', 'Int64'):
+            info = np.iinfo(dtype.lower())
+            if values.empty or (values.min() >= info.min and values.max() <= info.max):
+                return series.astype(dtype)
+        return series
+
+    def _downcast_float(self, series):
+        if series.dtype != 'float64':
+            return series
+        downcast = series.astype('float32')
+        # only keep float32 if it doesn't change any value
+        if ((downcast.astype('float64') == series) | series.isna()).all():
+            return downcast
+        return series
+
+    def _concat_chunks(self, table_name, chunks, categorical):
+        if not chunks:
+            return pd.DataFrame()
+        # give every chunk the same categories, otherwise concat falls back to object.
+        # a chunk where the column is all NULL reads as float64 and has float categories,
+        # so merge the categories as objects instead of using union_categoricals
+        for col in categorical:
+            categories = pd.Index(pd.unique(np.concatenate(
+                [chunk[col].cat.categories.astype(object) for chunk in chunks]
+            )))
+            for chunk in chunks:
+                chunk[col] = pd.Categorical(chunk[col], categories=categories)
+        df = pd.concat(chunks, ignore_index=True)
+        # chunks may have been downcast to different widths, downcast the result again
+        return self._optimize(table_name, df, [])
+
+    def _report(self, table_name, before, df, chunked):
+        after = df.memory_usage(deep=True).sum()
+        self._used_bytes += after
+        self.memory_report.append({
+            "Table Name": table_name,
+            "Memory Before (MB)": round(before / 1024 ** 2, 2),
+            "Memory After (MB)": round(after / 1024 ** 2, 2),
+            "Chunked": chunked
+        })
+        before_label = "estimated " if chunked else ""
+        print(f"{table_name}: {before_label}{before / 1024 ** 2:.1f} MB -> {after / 1024 ** 2:.1f} MB")
+
+        if self.memory_budget is not None and self._used_bytes > self.memory_budget:
+            message = (f"Extracted tables use {self._used_bytes / 1024 ** 2:.1f} MB, "
+                       f"over the memory budget of {self.memory_budget / 1024 ** 2:.1f} MB (after '{table_name}')")
+            if self.strict_budget:
+                raise RuntimeError(message)
+            print(f"Warning: {message}")
+
 #ETL: extract, transform, load
 class Extract:  
 
+    # tables served by the API instead of read from the csv folder
+    API_TABLES = ['order_payments', 'order_reviews']
+
+    def __init__(self, optimizer=None):
+        # optional OptimizeDtypes, shrinks every extracted table
+        self.optimizer = optimizer
+
     # This function can remain outside the class to fetch data
     def fetch_all_data_api(self, endpoint: str, chunk_size: int = 10000, base_url: str = "http://localhost:your port number"):
         all_data = []
@@ -198,59 +517,337 @@ class Extract:
         actual_dfs = {}
         for file in os.listdir(folder_path):
                 file_path = os.path.join(folder_path, file)
+                if not file.endswith('.csv'):
+                    continue  # e.g. Arrow files or other leftovers in the raw folder
                 if file.startswith('olist_') and '_dataset.csv' in file:
                     df_key = file.replace('olist_', '').replace('_dataset.csv', '')
                 else:
                     df_key = file.replace('.csv', '')
 
-                actual_dfs[df_key] = pd.read_csv(file_path)
+                if df_key in self.API_TABLES:
+                    continue  # fetched from the API below
+
+                if self.optimizer:
+                    actual_dfs[df_key] = self.optimizer.read_csv(df_key, file_path)
+                else:
+                    actual_dfs[df_key] = pd.read_csv(file_path)
         #update actual_dfs
         geo = actual_dfs['geolocation'] 
         geo = geo.drop_duplicates()
         actual_dfs['geolocation']  = geo
-        actual_dfs.pop('order_payments')
-        actual_dfs.pop('order_reviews')
-        actual_dfs['order_payments'] = self.fetch_all_data_api('order_payments')
-        actual_dfs['order_reviews'] = self.fetch_all_data_api('order_reviews')
+        for table_name in self.API_TABLES:
+            df = self.fetch_all_data_api(table_name)
+            actual_dfs[table_name] = self.optimizer.optimize(table_name, df) if self.optimizer else df
         print(actual_dfs.keys())
 
         #self.extract_from_api(actual_dfs)
         return actual_dfs
 
+class LogSink:
+    '''
+    Buffers log entries in memory and writes them out in one go.
+
+    Entries are grouped by their target (a file path for csv/parquet, or a
+    path/table name for sql) and written when flush() is called, or when the
+    number of buffered entries reaches max_buffered_entries.
+    Safe to share between threads.
+
+    Parameters:
+        fmt (str): 'csv', 'parquet' or 'sql'
+        engine (SQLAlchemy Engine): required when fmt is 'sql'
+        max_buffered_entries (int): flush automatically once this many entries are buffered
+    '''
+    FORMATS = ('csv', 'parquet', 'sql')
+
+    def __init__(self, fmt='csv', engine=None, max_buffered_entries=10000):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unsupported log format '{fmt}', expected one of {self.FORMATS}")
+        if fmt == 'sql' and engine is None:
+            raise ValueError("An engine is required for the 'sql' log format")
+        self.fmt = fmt
+        self.engine = engine
+        self.max_buffered_entries = max_buffered_entries
+        self._buffers = {}
+        self._dtypes = {}
+        self._buffered = 0
+        self._lock = RLock()
+
+    def write(self, target, entries, dtypes=None):
+        '''
+        Adds entries (list of dicts) for the given target to the buffer.
+        dtypes ({column: dtype}) is applied to the target's columns when written,
+        e.g. 'Int64' keeps a count column integer when some entries have None.
+        '''
+        if not entries:
+            return
+        with self._lock:
+            if dtypes:
+                self._dtypes.setdefault(target, {}).update(dtypes)
+            self._buffers.setdefault(target, []).extend(entries)
+            self._buffered += len(entries)
+            if self._buffered >= self.max_buffered_entries:
+                self.flush()
+
+    def flush(self):
+        '''
+        Writes every buffered entry with one write per target.
+        A target is only removed from the buffer once it was written, so a failing
+        target doesn't lose the entries of the others and can be retried later.
+        The first error is raised after every target was tried.
+        '''
+        with self._lock:
+            first_error = None
+            for target, entries in list(self._buffers.items()):
+                try:
+                    log_df = pd.DataFrame(entries).astype(self._dtypes.get(target, {}))
+                    self._write_target(target, log_df)
+                except Exception as e:
+                    print(f"Failed to write logs to {target}: {e}")
+                    first_error = first_error or e
+                    continue
+                del self._buffers[target]
+                self._buffered -= len(entries)
+            if first_error:
+                raise first_error
+
+    def _write_target(self, target, log_df):
+        if self.fmt == 'csv':
+            log_df.to_csv(target, mode='a', index=False, header=not os.path.exists(target))
+
+        elif self.fmt == 'parquet':
+            # Parquet files can't be appended to, so rewrite with the previous rows
+            if os.path.exists(target):
+                log_df = pd.concat([pd.read_parquet(target), log_df], ignore_index=True)
+            log_df.to_parquet(target, index=False)
+
+        else:
+            # 'invalid_pks.csv' -> invalid_pks table
+            table_name = os.path.splitext(os.path.basename(target))[0]
+            log_df.to_sql(table_name, self.engine, index=False, if_exists='append')
+
+class Tracer:
+    '''
+    Opt-in tracing for the pipeline classes and the SQL statements they run.
+
+    Every instrumented method and SQL statement becomes a span with its duration,
+    rows and bytes. stop() writes the spans as a Chrome trace JSON file
+    (open it in chrome://tracing, Perfetto or speedscope).
+
+    Parameters:
+        trace_path (str): output path of the trace JSON file
+        profile_path (str): if given, the run is also profiled with cProfile and the stats dumped here
+        tracemalloc_path (str): if given, a tracemalloc snapshot of the run is dumped here
+    '''
+    def __init__(self, trace_path, profile_path=None, tracemalloc_path=None):
+        self.trace_path = trace_path
+        self.profile_path = profile_path
+        self.tracemalloc_path = tracemalloc_path
+        self._events = []
+        self._originals = []
+        self._listeners = []
+        self._lock = RLock()
+        self._profiler = None
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, name, category='method'):
+        '''
+        Records a span around the with block. The yielded dict is stored as the span's args.
+        '''
+        args = {}
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self._add_event(name, category, start, time.perf_counter(), args)
+
+    def _add_event(self, name, category, start, end, args):
+        event_data = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": get_ident(),
+            "args": args
+        }
+        with self._lock:
+            self._events.append(event_data)
+
+    def instrument(self, *classes):
+        '''
+        Wraps every method of the given classes in a span, without changing the classes' code.
+        '''
+        for cls in classes:
+            for name, func in list(vars(cls).items()):
+                if name.startswith('__') or not inspect.isfunction(func):
+                    continue
+                self._originals.append((cls, name, func))
+                setattr(cls, name, self._wrap(f"{cls.__name__}.{name}", func))
+
+    def _wrap(self, span_name, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.span(span_name) as span_args:
+                in_rows, in_bytes = self._frame_size(list(args) + list(kwargs.values()))
+                result = func(*args, **kwargs)
+                out_rows, out_bytes = self._frame_size([result])
+                span_args.update(in_rows=in_rows, in_bytes=in_bytes, out_rows=out_rows, out_bytes=out_bytes)
+                return result
+        return wrapper
+
+    def _frame_size(self, values):
+        # rows and shallow memory of the DataFrames among values (also inside dicts like clean_dfs)
+        rows, size = 0, 0
+        for value in values:
+            frames = value.values() if isinstance(value, dict) else [value]
+            for frame in frames:
+                if isinstance(frame, pd.DataFrame):
+                    rows += len(frame)
+                    size += int(frame.memory_usage(index=True).sum())
+        return rows, size
+
+    def instrument_engine(self, engine):
+        '''
+        Records a span for every SQL statement executed through engine, until stop() is called.
+        Rows returned by a SELECT are counted as they are fetched, so they are
+        added to the span's args after the span itself has ended.
+        '''
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            context._trace_start = time.perf_counter()
+
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            rows = parameters if executemany else [parameters]
+            args = {
+                "statement": statement[:500],
+                "param_rows": len(rows),
+                "param_bytes": self._estimate_bytes(rows, len(rows))
+            }
+            # DBAPI drivers report -1 for statements whose row count isn't known (SELECTs)
+            if cursor.rowcount >= 0:
+                args["rowcount"] = cursor.rowcount
+            if cursor.description is not None:
+                args.update(result_rows=0, result_bytes=0)
+                context.cursor = _CountingCursor(cursor, args, self._estimate_bytes)
+            self._add_event(statement.split(None, 1)[0].upper() if statement.strip() else "SQL", "sql",
+                            context._trace_start, time.perf_counter(), args)
+
+        self._listeners.extend([
+            (engine, 'before_cursor_execute', before_cursor_execute),
+            (engine, 'after_cursor_execute', after_cursor_execute)
+        ])
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+    def _estimate_bytes(self, rows, row_count):
+        # measured on the first row only, so large executemany inserts
+        # don't add work proportional to rows x columns to the traced span
+        if not row_count or not rows:
+            return 0
+        first_row = rows[0]
+        values = first_row.values() if isinstance(first_row, dict) else (first_row or ())
+        return sum(sys.getsizeof(value) for value in values) * row_count
+
+    def start(self):
+        if self.profile_path:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        if self.tracemalloc_path:
+            tracemalloc.start()
+
+    def stop(self):
+        '''
+        Stops profiling, restores the instrumented methods and writes all output files.
+        '''
+        if self._profiler:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.profile_path)
+            print(f"cProfile stats saved to {self.profile_path}")
+            self._profiler = None
+
+        if self.tracemalloc_path and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            snapshot.dump(self.tracemalloc_path)
+            print(f"tracemalloc snapshot saved to {self.tracemalloc_path} "
+                  f"(current {current / 1024 ** 2:.1f} MB, peak {peak / 1024 ** 2:.1f} MB)")
+
+        for cls, name, func in self._originals:
+            setattr(cls, name, func)
+        self._originals = []
+
+        for target, identifier, listener in self._listeners:
+            event.remove(target, identifier, listener)
+        self._listeners = []
+
+        with self._lock:
+            events = list(self._events)
+        with open(self.trace_path, 'w') as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file, default=str)
+        print(f"Trace with {len(events)} spans saved to {self.trace_path}")
+
+class _CountingCursor:
+    '''
+    Wraps a DBAPI cursor and adds the rows fetched from it to a Tracer span's args.
+    '''
+    def __init__(self, cursor, span_args, estimate_bytes):
+        self._cursor = cursor
+        self._span_args = span_args
+        self._estimate_bytes = estimate_bytes
+
+    def _count(self, rows):
+        if rows:
+            self._span_args["result_rows"] += len(rows)
+            self._span_args["result_bytes"] += self._estimate_bytes(rows, len(rows))
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        self._count([row] if row is not None else [])
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._count(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._count(rows)
+        return rows
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
 class LogsAndErrors:
+    # shared by every logging function below, replace it to change the log format
+    sink = LogSink()
+
     def __init__(self, connection):
         self.engine = connection.engine
 
+    @staticmethod
+    def _flush_at_exit():
+        # whatever sink is in use when the interpreter exits
+        LogsAndErrors.sink.flush()
+
     def invalid_pks_log(table_name, invalid_rows, pk_cols, pk_log_file_path):
 
         if invalid_rows.empty:
             return  # No errors to log
 
-        # Step 1: Create error messages
-        error_messages = [
-            f"NULL values in PK columns: {pk_cols}"
-            for _, row in invalid_rows.iterrows()
-        ]
-        
-        # Step 2: Count duplicates
-        error_counts = Counter(error_messages)
-        
-        # Step 3: Write to CSV
-        log_entries = []
-        for error_detail, count in error_counts.items():
-            log_entries.append({
-                "Table Name": table_name,
-                "Error Type": "Invalid PK",
-                "Affected Records Count": count,
-                "Error Details": error_detail,
-                "Timestamp": datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            })
-        
-        # Convert to DataFrame
-        log_df = pd.DataFrame(log_entries)
+        # Every row has the same error message, so one entry covers them all
+        log_entries = [{
+            "Table Name": table_name,
+            "Error Type": "Invalid PK",
+            "Affected Records Count": len(invalid_rows),
+            "Error Details": f"NULL values in PK columns: {pk_cols}",
+            "Timestamp": datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }]
 
-        # Append to CSV
-        log_df.to_csv(pk_log_file_path, mode='a', index=False, header=not os.path.exists(pk_log_file_path))
+        # Buffer, written when the sink is flushed
+        LogsAndErrors.sink.write(pk_log_file_path, log_entries)
 
     
     def invalid_fks_log(child_table_name, parent_table_name, fk_column, invalid_rows, fk_log_file_path):
@@ -267,31 +864,23 @@ class LogsAndErrors:
         if invalid_rows.empty:
             return  # No errors to log
 
-        # Step 1: Create error messages
-        error_messages = [
-            f"{fk_column}={row[fk_column]} not found in {parent_table_name}.{fk_column}"
-            for _, row in invalid_rows.iterrows()
-        ]
+        # Step 1: Count duplicate FK values
+        value_counts = Counter(invalid_rows[fk_column])
         
-        # Step 2: Count duplicates
-        error_counts = Counter(error_messages)
-        
-        # Step 3: Write to CSV
+        # Step 2: Create one entry per distinct value
+        timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         log_entries = []
-        for error_detail, count in error_counts.items():
+        for value, count in value_counts.items():
             log_entries.append({
                 "Table Name": child_table_name,
                 "Error Type": "Invalid FK",
                 "Affected Records Count": count,
-                "Error Details": error_detail,
-                "Timestamp": datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                "Error Details": f"{fk_column}={value} not found in {parent_table_name}.{fk_column}",
+                "Timestamp": timestamp
             })
         
-        # Convert to DataFrame
-        log_df = pd.DataFrame(log_entries)
-        
-        # Append to CSV
-        log_df.to_csv(fk_log_file_path, mode='a', index=False, header=not os.path.exists(fk_log_file_path))
+        # Step 3: Buffer, written when the sink is flushed
+        LogsAndErrors.sink.write(fk_log_file_path, log_entries)
 
     
     def log_counts(self, actual_dfs,  log_file_path):
@@ -304,57 +893,138 @@ class LogsAndErrors:
             log_file_path (str): Path to the CSV log file.
         '''
         log_entries = []
+        table_counts = self.fetch_table_counts(list(actual_dfs.keys()))
 
         for table_name, df in actual_dfs.items():
             print(f"Checking record count for '{table_name}'...")
-            expected_count = len(df)
-            
-            with self.engine.connect() as conn:
-                result = conn.execute(text(f"SELECT COUNT(*) FROM {table_name}"))
-                actual_count = result.scalar()
-            
-            log_entries.append([
-                table_name,
-                expected_count,
-                actual_count,
-                datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            ])
-
-        # Convert to DataFrame
-        log_df = pd.DataFrame(log_entries, columns=["Table Name", "Expected Records", "Actual Records", "Timestamp"])
-        
-        # Save to CSV (append mode, write header only if file doesn't exist)
-        log_df.to_csv(log_file_path, mode='a', header=not os.path.exists(log_file_path), index=False)
+            log_entries.append({
+                "Table Name": table_name,
+                "Expected Records": len(df),
+                "Actual Records": table_counts.get(table_name),
+                "Timestamp": datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            })
 
-    def log_data_quality_issues(table_name, bad_rows, error_msg, data_issues_path):
+        # Buffer, written when the sink is flushed
+        LogsAndErrors.sink.write(log_file_path, log_entries)
 
-        if bad_rows.empty:
-            return  # No errors to log
+    def fetch_table_counts(self, table_names):
+        '''
+        Returns {table_name: row count} for all given tables using a single query.
+
+        On SQL Server the counts are read from the catalog (sys.dm_db_partition_stats),
+        which doesn't scan the tables. Other backends, or a login without
+        VIEW DATABASE STATE permission, fall back to one UNION ALL of COUNT(*).
+        '''
+        if not table_names:
+            return {}
+
+        if self.engine.dialect.name == 'mssql':
+            catalog_query = text("""
+                SELECT 
+                    t.name, 
+                    SUM(p.row_count)
+                FROM 
+                    sys.dm_db_partition_stats p
+                JOIN 
+                    sys.tables t 
+                    ON t.object_id = p.object_id
+                WHERE 
+                    p.index_id IN (0, 1)
+                    AND t.schema_id = SCHEMA_ID()
+                    AND t.name IN :names
+                GROUP BY 
+                    t.name
+            """).bindparams(bindparam('names', expanding=True))
+            try:
+                with self.engine.connect() as conn:
+                    catalog_counts = {
+                        table: int(count)
+                        for table, count in conn.execute(catalog_query, {"names": list(table_names)})
+                    }
+                return {table: catalog_counts.get(table) for table in table_names}
+            except SQLAlchemyError as e:
+                print(f"Catalog row counts unavailable, falling back to COUNT(*): {e}")
+
+        count_query = text(" UNION ALL ".join(
+            f"SELECT '{table}', COUNT(*) FROM {table}" for table in table_names
+        ))
+        with self.engine.connect() as conn:
+            return {table: count for table, count in conn.execute(count_query)}
+
+    def reconcile_counts(self, actual_dfs, clean_dfs, inserted_counts, counts_before, log_file_path):
+        '''
+        Reconciles row counts through the pipeline and logs one entry per table.
+
+        Parameters:
+            actual_dfs (dict): Extracted DataFrames (expected records)
+            clean_dfs (dict): DataFrames after PK/FK cleaning (cleaned records)
+            inserted_counts (dict): Rows inserted per table, as returned by Load.load_clean_data
+            counts_before (dict): Table row counts taken with fetch_table_counts before the load
+            log_file_path (str): Path to the log file, its columns differ from log_counts' file.
+
+        Status is 'OK' when the table grew by exactly the number of rows the
+        loader reported, 'Load failed' when the loader reported an error for
+        the table and 'Mismatch' otherwise.
+        '''
+        table_names = list(dict.fromkeys(list(actual_dfs) + list(clean_dfs) + list(inserted_counts)))
+        table_counts = self.fetch_table_counts(table_names)
+        timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-        # Step 1: Create error messages
-        error_messages = [
-            error_msg
-            for _, row in bad_rows.iterrows()
-        ]
-        
-        # Step 2: Count duplicates
-        error_counts = Counter(error_messages)
-        
-        # Step 3: Write to CSV
         log_entries = []
-        for error_detail, count in error_counts.items():
+        for table_name in table_names:
+            expected_count = len(actual_dfs[table_name]) if table_name in actual_dfs else None
+            cleaned_count = len(clean_dfs[table_name]) if table_name in clean_dfs else None
+            before_count = counts_before.get(table_name)
+            inserted_count = inserted_counts.get(table_name)
+            actual_count = table_counts.get(table_name)
+
+            if table_name in inserted_counts and inserted_count is None:
+                status = "Load failed"
+            elif None not in (before_count, inserted_count, actual_count) and actual_count - before_count == inserted_count:
+                status = "OK"
+            else:
+                status = "Mismatch"
+
+            print(f"{table_name}: expected={expected_count} cleaned={cleaned_count} before={before_count} "
+                  f"inserted={inserted_count} actual={actual_count} ({status})")
             log_entries.append({
                 "Table Name": table_name,
-                "Affected Records Count": count,
-                "Error Details": error_detail,
-                "Timestamp": datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                "Expected Records": expected_count,
+                "Cleaned Records": cleaned_count,
+                "Records Before": before_count,
+                "Inserted Records": inserted_count,
+                "Actual Records": actual_count,
+                "Status": status,
+                "Timestamp": timestamp
             })
+
+        # Buffer, written when the sink is flushed
+        # counts are None for tables missing from a stage, keep the columns integer anyway
+        count_dtypes = {
+            column: 'Int64'
+            for column in ["Expected Records", "Cleaned Records", "Records Before", "Inserted Records", "Actual Records"]
+        }
+        LogsAndErrors.sink.write(log_file_path, log_entries, dtypes=count_dtypes)
+        return log_entries
+
+    def log_data_quality_issues(table_name, bad_rows, error_msg, data_issues_path):
+
+        if bad_rows.empty:
+            return  # No errors to log
+
+        # Every row has the same error message, so one entry covers them all
+        log_entries = [{
+            "Table Name": table_name,
+            "Affected Records Count": len(bad_rows),
+            "Error Details": error_msg,
+            "Timestamp": datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }]
         
-        # Convert to DataFrame
-        log_df = pd.DataFrame(log_entries)
-        
-        # Append to CSV
-        log_df.to_csv(data_issues_path, mode='a', index=False, header=not os.path.exists(data_issues_path))
+        # Buffer, written when the sink is flushed
+        LogsAndErrors.sink.write(data_issues_path, log_entries)
+
+# write entries that were never flushed explicitly (e.g. when the module is imported)
+atexit.register(LogsAndErrors._flush_at_exit)
 
 class TransformPrimaryKey:
 
@@ -412,8 +1082,7 @@ class TransformPrimaryKey:
             
             # Log errors for removed rows
             invalid_rows = df[null_rows]
-            for _, row in invalid_rows.iterrows():
-                LogsAndErrors.invalid_pks_log(table_name, invalid_rows, pk_cols, pk_log_file_path)
+            LogsAndErrors.invalid_pks_log(table_name, invalid_rows, pk_cols, pk_log_file_path)
 
             return df[~null_rows]
         
@@ -600,6 +1269,10 @@ class CheckBeforeInsertion:
         self.TPK = TransformPrimaryKey(connection=self.engine)
 
     def check_insertion(self, df, table_name): 
+        '''
+        Inserts the rows of df whose PK isn't in the table yet.
+        Returns the number of rows inserted, or None if the insert failed.
+        '''
         table_pks = self.TPK.detect_primary_keys()
         try:    
             with self.engine.connect() as conn:
@@ -608,7 +1281,7 @@ class CheckBeforeInsertion:
                     # Initial load - insert everything
                     df.to_sql(table_name, self.engine, index=False, if_exists='append')
                     print(f"Initial insert: {len(df)} rows to {table_name}")
-                    return
+                    return len(df)
 
             # Step 4: Get existing PKs
             with self.engine.connect() as conn:
@@ -622,14 +1295,16 @@ class CheckBeforeInsertion:
             
             if new_records.empty:
                 print(f"No new records for {table_name}")
-                return
+                return 0
 
             # Step 6: Insert new records
             new_records.to_sql(table_name, self.engine, index=False, if_exists='append')
             print(f"Inserted {len(new_records)} new rows to {table_name}")
+            return len(new_records)
 
         except Exception as e:
             print(f"Error in {table_name}: {str(e)}")
+            return None
     
 class Load:
     def __init__(self, connection):
@@ -637,15 +1312,21 @@ class Load:
         self.CBI = CheckBeforeInsertion(connection=self.engine)
 
     def load_clean_data(self,clean_dfs):
+        '''
+        Loads tables in dependency order.
+        Returns {table_name: rows inserted} (None for tables that failed to load).
+        '''
         load_order = ['sellers', 'customers', 'product_category_name_translation', 'orders', 'products', 'order_payments', 'order_reviews', 'order_items', 'geolocation']
+        inserted_counts = {}
         # Load tables in dependency order
         print("\n Starting data load process...")
         for table_name in load_order:
             if table_name in clean_dfs:
                 print(f"\nProcessing {table_name}...")
-                self.CBI.check_insertion(clean_dfs[table_name], table_name)
+                inserted_counts[table_name] = self.CBI.check_insertion(clean_dfs[table_name], table_name)
             else:
                 print(f"\n Skipping {table_name} - no data to load")
+        return inserted_counts
             
 
 
@@ -664,7 +1345,7 @@ if __name__ == "__main__":
         olist_raw: olist raw data path
 
         --> these 4 below files, you just need to add the path, do not change file name, it will be created when running the script
-        record_log: log file path (#of records in raw data csvs, and #of records inserted in SQL server database)
+        reconcile_log: log file path (#of records in raw data csvs, after cleaning, in the database before/after the load and inserted)
         pk_log: invalid_pks file path
         fk_log: invalid_fks file path
         issues_log: data quality issues file path
@@ -672,12 +1353,25 @@ if __name__ == "__main__":
     log_paths = {
         "olist_raw" : r'your_path',
         "olist_ddl" : r'your_path\olist_ddl.txt',
-        "record_log" :  r'your_path'log_file.csv",
-        "pk_log" : r'your_path'\invalid_pks.csv", 
-        "fk_log" : r'your_path'\invalid_fks.csv",
-        "issues_log" : r'your_path'\data_quality_issues.csv",
-        "test_products" : r'your_path'\test_products.csv"
+        "reconcile_log" :  r'your_path\reconcile_log.csv',
+        "pk_log" : r'your_path\invalid_pks.csv', 
+        "fk_log" : r'your_path\invalid_fks.csv',
+        "issues_log" : r'your_path\data_quality_issues.csv',
+        "test_products" : r'your_path\test_products.csv'
          }
+
+    # tracing is off unless OLIST_TRACE is set to the trace file path (open it in chrome://tracing or speedscope),
+    # e.g. set OLIST_TRACE=your_path\olist_trace.json before running this script or the scheduler.
+    # OLIST_PROFILE and OLIST_TRACEMALLOC optionally add cProfile stats and a tracemalloc snapshot
+    trace_paths = {
+        "trace" : os.environ.get('OLIST_TRACE'),
+        "profile" : os.environ.get('OLIST_PROFILE'),
+        "tracemalloc" : os.environ.get('OLIST_TRACEMALLOC')
+         }
+
+    # log format: 'csv', 'parquet' or 'sql' (sql writes to log tables named after the log files)
+    log_format = 'csv'
+
     
     # change to your connection settings
     config = {
@@ -686,50 +1380,76 @@ if __name__ == "__main__":
         "database": "your database name"
     }
 
-    #start api
-    API_starter = StartAPI(api_data)
-    API_starter.run()
-
-    # Create connection instance
-    connector = SQLConnection(config)
+    tracer = None
+    if trace_paths['trace']:
+        tracer = Tracer(trace_paths['trace'], profile_path=trace_paths['profile'], tracemalloc_path=trace_paths['tracemalloc'])
+        tracer.instrument(Extract, OptimizeDtypes, TransformPrimaryKey, TransformForiegnKey,
+                          DataQualityIssues, CheckBeforeInsertion, Load, LogsAndErrors)
+        tracer.start()
 
     try:
-        connector.connect()
-        # Your database operations would go here
+        #start api
+        #serve_mode='mmap' with workers > 1 shares one memory-mapped copy of the data between worker processes (needs pyarrow)
+        API_starter = StartAPI(api_data, serve_mode='memory', workers=1)
+        API_starter.run()
+
+        # Create connection instance
+        connector = SQLConnection(config)
+
+        try:
+            connector.connect()
+            # Your database operations would go here
         
-    except RuntimeError as e:
-        print(f"Operation failed: {e}")
+        except RuntimeError as e:
+            print(f"Operation failed: {e}")
         
-    finally:
-        connector.disconnect()
+        finally:
+            connector.disconnect()
+
+        if tracer and connector.engine:
+            tracer.instrument_engine(connector.engine)
 
-    #create DB tables
-    creator = CreateDataBaseTables(connector)
-    creator.create_tables(log_paths['olist_ddl'])
+        #buffer all logs of this run, written once at the end
+        LogsAndErrors.sink = LogSink(log_format, engine=connector.engine if log_format == 'sql' else None)
 
-    #extract data from csvs and api
-    extractor = Extract()
-    actual_dfs =  extractor.extract_from_csvs(log_paths['olist_raw'])
+        #create DB tables
+        creator = CreateDataBaseTables(connector)
+        creator.create_tables(log_paths['olist_ddl'])
 
-    #check and clean pks
-    pk_transformer = TransformPrimaryKey(connector)
-    cleaned_pk_dfs = pk_transformer.update_dfs(log_paths['pk_log'])
+        #extract data from csvs and api, with dtypes shrunk according to the DDL
+        #set memory_budget_mb to read tables in chunks once the budget would be exceeded
+        optimizer = OptimizeDtypes(log_paths['olist_ddl'], memory_budget_mb=None)
+        extractor = Extract(optimizer)
+        actual_dfs =  extractor.extract_from_csvs(log_paths['olist_raw'])
 
-    #check and clean fks
-    fk_transformer = TransformForiegnKey()
-    clean_dfs = fk_transformer.transform_fks(cleaned_pk_dfs, log_paths['fk_log'])
+        #check and clean pks
+        pk_transformer = TransformPrimaryKey(connector)
+        cleaned_pk_dfs = pk_transformer.update_dfs(log_paths['pk_log'])
 
-    #Load data to sql server
-    Loader = Load(connector)
-    Loader.load_clean_data(clean_dfs)
+        #check and clean fks
+        fk_transformer = TransformForiegnKey()
+        clean_dfs = fk_transformer.transform_fks(cleaned_pk_dfs, log_paths['fk_log'])
 
-    #save to log file 
-    count_logger = LogsAndErrors(connector)
-    count_logger.log_counts(actual_dfs, log_paths['record_log'])
+        #Load data to sql server, counting rows before and after
+        count_logger = LogsAndErrors(connector)
+        counts_before = count_logger.fetch_table_counts(list(clean_dfs.keys()))
+        Loader = Load(connector)
+        inserted_counts = Loader.load_clean_data(clean_dfs)
 
-    #save data quality issues
-    issues_logger = DataQualityIssues()
-    issues_logger.check_all_missing_values(clean_dfs, log_paths['issues_log'])
-    issues_logger.check_all_duplicates(clean_dfs, log_paths['issues_log'])
-    issues_logger.check_order_dates(clean_dfs['orders'],'orders', log_paths['issues_log'] )
+        #save to log file: expected / cleaned / before / inserted / actual records per table
+        count_logger.reconcile_counts(actual_dfs, clean_dfs, inserted_counts, counts_before, log_paths['reconcile_log'])
+
+        #save data quality issues
+        issues_logger = DataQualityIssues()
+        issues_logger.check_all_missing_values(clean_dfs, log_paths['issues_log'])
+        issues_logger.check_all_duplicates(clean_dfs, log_paths['issues_log'])
+        issues_logger.check_order_dates(clean_dfs['orders'],'orders', log_paths['issues_log'] )
+
+    finally:
+        #write all buffered logs and the trace, also when the run or the log flush failed
+        try:
+            LogsAndErrors.sink.flush()
+        finally:
+            if tracer:
+                tracer.stop()
   